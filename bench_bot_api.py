@@ -0,0 +1,102 @@
+"""
+Benchmark tốc độ gửi tin nhắn tới Bot API theo kích thước connection pool.
+
+Chạy 1 stub Bot API server cục bộ (HTTP/1.1 keep-alive, trả lời giả sendMessage/getMe
+sau LATENCY ms) rồi gửi N tin nhắn song song qua telegram.Bot với request từ bot_request.py.
+
+    python bench_bot_api.py --messages 2000 --concurrency 64 --latency-ms 50 --pools 1 4 8 16 32
+
+Các cấu hình còn lại (keep-alive, timeout) lấy từ env như khi chạy bot.
+Stub server chỉ hỗ trợ HTTP/1.1 (httpx không dùng HTTP/2 cho http:// không TLS).
+Stub và client chạy chung 1 event loop nên với pool rất lớn kết quả bị giới hạn bởi CPU,
+nên so sánh các pool size trong khoảng thực tế với latency gần với latency thật tới Telegram.
+"""
+import time
+import json
+import asyncio
+import argparse
+from telegram import Bot
+from bot_request import build_request, get_request_config
+
+TOKEN = "123456:BENCH"
+
+def _result_for(method):
+    if method == "getMe":
+        return {"id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+    if method in ("sendMessage", "editMessageText"):
+        return {"message_id": 1, "date": int(time.time()), "chat": {"id": 1, "type": "private"}, "text": "ok"}
+    return True
+
+async def _handle_conn(reader, writer, latency, stats):
+    stats["connections"] += 1
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            lines = head.decode("latin-1").split("\r\n")
+            path = lines[0].split(" ")[1]
+            headers = {k.strip().lower(): v.strip() for k, _, v in (ln.partition(":") for ln in lines[1:] if ln)}
+            length = int(headers.get("content-length", 0))
+            if length:
+                await reader.readexactly(length)
+            if latency:
+                await asyncio.sleep(latency)
+            method = path.rsplit("/", 1)[-1]
+            body = json.dumps({"ok": True, "result": _result_for(method)}).encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+            )
+            await writer.drain()
+            if headers.get("connection", "").lower() == "close":
+                break
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+async def _run_once(port, pool_size, messages, concurrency):
+    request = build_request(pool_size=pool_size)
+    bot = Bot(TOKEN, base_url=f"http://127.0.0.1:{port}/bot", request=request)
+    async with bot:
+        sem = asyncio.Semaphore(concurrency)
+
+        async def send(i):
+            async with sem:
+                await bot.send_message(chat_id=1, text=f"bench {i}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(send(i) for i in range(messages)))
+        return time.perf_counter() - start
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark Bot API throughput theo pool size")
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--pools", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    stats = {"connections": 0}
+    server = await asyncio.start_server(
+        lambda r, w: _handle_conn(r, w, args.latency_ms / 1000, stats), "127.0.0.1", 0
+    )
+    port = server.sockets[0].getsockname()[1]
+    cfg = get_request_config()
+    print(
+        f"Stub Bot API :{port}, latency {args.latency_ms:.0f}ms, {args.messages} tin, "
+        f"concurrency {args.concurrency}, keepalive_expiry {cfg['keepalive_expiry'] or 'httpx mặc định 5'}s, "
+        f"pool_timeout {cfg['pool_timeout']}s"
+    )
+    print(f"{'pool':>6} {'giây':>8} {'tin/giây':>10} {'kết nối':>8}")
+    async with server:
+        for pool_size in args.pools:
+            stats["connections"] = 0
+            try:
+                elapsed = await _run_once(port, pool_size, args.messages, args.concurrency)
+            except Exception as e:
+                print(f"{pool_size:>6} lỗi: {e!r} (thử tăng BOT_POOL_TIMEOUT)")
+                continue
+            print(f"{pool_size:>6} {elapsed:>8.2f} {args.messages / elapsed:>10.1f} {stats['connections']:>8}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+import os
+import httpx
+from telegram.request import HTTPXRequest
+
+# ================== CẤU HÌNH HTTP (Railway → Variables) ==================
+# BOT_POOL_SIZE=256          số kết nối tối đa tới Bot API (mặc định như ApplicationBuilder của PTB)
+# BOT_KEEPALIVE=256          số kết nối keep-alive được giữ lại (mặc định = BOT_POOL_SIZE)
+# BOT_KEEPALIVE_EXPIRY=5     giây giữ kết nối rảnh trước khi đóng (mặc định như httpx)
+# BOT_HTTP2=0                bật HTTP/2 (cần python-telegram-bot[http2])
+# BOT_CONNECT_TIMEOUT=5      timeout mặc định (giây) cho mỗi lần gọi API,
+# BOT_READ_TIMEOUT=5         từng lệnh vẫn có thể ghi đè bằng tham số read_timeout=..., v.v.
+# BOT_WRITE_TIMEOUT=5
+# BOT_POOL_TIMEOUT=1         thời gian chờ lấy kết nối rảnh khi pool đã đầy
+
+def _env_float(name, default):
+    value = os.getenv(name)
+    return float(value) if value else default
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+def get_request_config():
+    """Đọc cấu hình HTTP client từ env."""
+    return {
+        # ApplicationBuilder (PTB 20.7) mặc định dùng pool 256 kết nối, giữ nguyên khi không set env
+        "pool_size": _env_int("BOT_POOL_SIZE", 256),
+        "keepalive": _env_int("BOT_KEEPALIVE", None),
+        # None -> giữ mặc định của httpx (5s), không giữ lâu kết nối mà Telegram có thể đã đóng
+        "keepalive_expiry": _env_float("BOT_KEEPALIVE_EXPIRY", None),
+        "http2": os.getenv("BOT_HTTP2", "").lower() in ("1", "true", "on"),
+        "connect_timeout": _env_float("BOT_CONNECT_TIMEOUT", 5.0),
+        "read_timeout": _env_float("BOT_READ_TIMEOUT", 5.0),
+        "write_timeout": _env_float("BOT_WRITE_TIMEOUT", 5.0),
+        "pool_timeout": _env_float("BOT_POOL_TIMEOUT", 1.0),
+    }
+
+class TunedHTTPXRequest(HTTPXRequest):
+    """
+    HTTPXRequest cho phép chỉnh số kết nối keep-alive và thời gian giữ kết nối.
+    HTTPXRequest gốc (python-telegram-bot 20.7) luôn dùng keepalive = pool size và expiry mặc định của httpx.
+
+    Lưu ý: dựa vào thuộc tính/hàm private `_client_kwargs` và `_build_client` của HTTPXRequest
+    bản 20.7 (đã pin trong requirements.txt). Khi nâng cấp python-telegram-bot phải kiểm tra lại.
+    """
+
+    def __init__(self, keepalive=None, keepalive_expiry=None, **kwargs):
+        super().__init__(**kwargs)
+        pool_size = kwargs.get("connection_pool_size", 1)
+        limits = {
+            "max_connections": pool_size,
+            "max_keepalive_connections": pool_size if keepalive is None else min(keepalive, pool_size),
+        }
+        if keepalive_expiry is not None:
+            # Không truyền None vào httpx: với httpx None nghĩa là giữ kết nối rảnh mãi mãi
+            limits["keepalive_expiry"] = keepalive_expiry
+        self._client_kwargs["limits"] = httpx.Limits(**limits)
+        self._client = self._build_client()
+
+def build_request(**overrides):
+    """Tạo request object cho Bot API từ env; overrides dùng cho benchmark (VD: pool_size=16)."""
+    cfg = {**get_request_config(), **overrides}
+    return TunedHTTPXRequest(
+        connection_pool_size=cfg["pool_size"],
+        keepalive=cfg["keepalive"],
+        keepalive_expiry=cfg["keepalive_expiry"],
+        http_version="2" if cfg["http2"] else "1.1",
+        connect_timeout=cfg["connect_timeout"],
+        read_timeout=cfg["read_timeout"],
+        write_timeout=cfg["write_timeout"],
+        pool_timeout=cfg["pool_timeout"],
+    )
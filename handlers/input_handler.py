@@ -1,9 +1,16 @@
 from telegram import Update
 from telegram.ext import ContextTypes
-from handlers.xien import clean_numbers_input as clean_numbers_xien, gen_xien, format_xien_result
+from handlers.xien import (
+    clean_numbers_input as clean_numbers_xien, gen_xien, format_xien_result,
+    gen_xien_cover, format_xien_cover_result, MAX_COVER_NUMBERS,
+)
 from handlers.cang_dao import clean_numbers_input, ghep_cang, dao_so
 from handlers.phongthuy import phongthuy_tudong
 from handlers.keyboards import get_back_reset_keyboard
+from handlers.panel import reply
+
+# Giới hạn độ dài 1 tin nhắn của Telegram
+MAX_MESSAGE_LEN = 4096
 
 async def handle_user_free_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not update.message or not update.message.text:
@@ -17,27 +24,43 @@ async def handle_user_free_input(update: Update, context: ContextTypes.DEFAULT_T
         numbers = clean_numbers_xien(text)
         combos = gen_xien(numbers, n)
         result = format_xien_result(combos)
-        await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text=result,
-            parse_mode="Markdown",
-            reply_markup=get_back_reset_keyboard("ghep_xien_cang_dao")
-        )
+        await reply(update, context, result, reply_markup=get_back_reset_keyboard("ghep_xien_cang_dao"))
         user_data["wait_for_xien_input"] = None
         return
 
+    # ---- XIÊN PHỦ ----
+    if user_data.get("wait_for_xien_cover"):
+        k, t = user_data.get("wait_for_xien_cover")
+        numbers = clean_numbers_xien(text)
+        if len(set(numbers)) > MAX_COVER_NUMBERS:
+            await reply(
+                update, context,
+                f"❗ Dàn tối đa {MAX_COVER_NUMBERS} số cho xiên phủ, bạn nhập {len(set(numbers))} số. Nhập lại dàn:",
+                reply_markup=get_back_reset_keyboard("ghep_xien_cang_dao"),
+            )
+            return
+        combos = gen_xien_cover(numbers, k, t)
+        result = format_xien_cover_result(combos, numbers, k, t)
+        if len(result) > MAX_MESSAGE_LEN:
+            # Quá dài cho 1 tin nhắn -> gửi danh sách vé dạng file, tiêu đề vẫn hiện trong chat
+            header, _, body = result.partition("\n")
+            await context.bot.send_document(
+                chat_id=update.effective_chat.id,
+                document=body.encode("utf-8"),
+                filename=f"xien{k}_phu_bo{t}.txt",
+            )
+            result = header + "\n📎 Danh sách vé dài, xem file đính kèm."
+        await reply(update, context, result, reply_markup=get_back_reset_keyboard("ghep_xien_cang_dao"))
+        user_data["wait_for_xien_cover"] = None
+        return
+
     # ---- GHÉP CÀNG 3D ----
     if user_data.get("wait_cang3d_numbers"):
         numbers = clean_numbers_input(text)
         user_data["cang3d_numbers"] = numbers
         user_data["wait_cang3d_cang"] = True
         user_data["wait_cang3d_numbers"] = None
-        await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text="Nhập càng (1 số):",
-            parse_mode="Markdown",
-            reply_markup=get_back_reset_keyboard("ghep_xien_cang_dao")
-        )
+        await reply(update, context, "Nhập càng (1 số):", reply_markup=get_back_reset_keyboard("ghep_xien_cang_dao"))
         return
 
     if user_data.get("wait_cang3d_cang"):
@@ -45,12 +68,7 @@ async def handle_user_free_input(update: Update, context: ContextTypes.DEFAULT_T
         numbers = user_data.get("cang3d_numbers", [])
         result = ghep_cang(numbers, cang)
         msg = "Kết quả ghép càng 3D:\n" + ", ".join(result)
-        await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text=msg,
-            parse_mode="Markdown",
-            reply_markup=get_back_reset_keyboard("ghep_xien_cang_dao")
-        )
+        await reply(update, context, msg, reply_markup=get_back_reset_keyboard("ghep_xien_cang_dao"))
         user_data["wait_cang3d_cang"] = None
         user_data["cang3d_numbers"] = []
         return
@@ -61,12 +79,7 @@ async def handle_user_free_input(update: Update, context: ContextTypes.DEFAULT_T
         user_data["cang4d_numbers"] = numbers
         user_data["wait_cang4d_cang"] = True
         user_data["wait_cang4d_numbers"] = None
-        await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text="Nhập càng (1 số):",
-            parse_mode="Markdown",
-            reply_markup=get_back_reset_keyboard("ghep_xien_cang_dao")
-        )
+        await reply(update, context, "Nhập càng (1 số):", reply_markup=get_back_reset_keyboard("ghep_xien_cang_dao"))
         return
 
     if user_data.get("wait_cang4d_cang"):
@@ -74,12 +87,7 @@ async def handle_user_free_input(update: Update, context: ContextTypes.DEFAULT_T
         numbers = user_data.get("cang4d_numbers", [])
         result = ghep_cang(numbers, cang)
         msg = "Kết quả ghép càng 4D:\n" + ", ".join(result)
-        await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text=msg,
-            parse_mode="Markdown",
-            reply_markup=get_back_reset_keyboard("ghep_xien_cang_dao")
-        )
+        await reply(update, context, msg, reply_markup=get_back_reset_keyboard("ghep_xien_cang_dao"))
         user_data["wait_cang4d_cang"] = None
         user_data["cang4d_numbers"] = []
         return
@@ -92,35 +100,20 @@ async def handle_user_free_input(update: Update, context: ContextTypes.DEFAULT_T
             msg = "Tất cả hoán vị:\n" + ", ".join(result)
         else:
             msg = "❗ Nhập số hợp lệ (2-6 chữ số)!"
-        await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text=msg,
-            parse_mode="Markdown",
-            reply_markup=get_back_reset_keyboard("ghep_xien_cang_dao")
-        )
+        await reply(update, context, msg, reply_markup=get_back_reset_keyboard("ghep_xien_cang_dao"))
         user_data["wait_for_dao_so"] = None
         return
 
     # ---- TRA KẾT QUẢ XỔ SỐ ----
     if user_data.get("wait_kq_date"):
         ketqua = 'Tính năng KQ đã tắt'
-        await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text=ketqua,
-            parse_mode="Markdown",
-            reply_markup=get_back_reset_keyboard("menu")
-        )
+        await reply(update, context, ketqua, reply_markup=get_back_reset_keyboard("menu"))
         user_data["wait_kq_date"] = None
         return
 
     # ---- PHONG THỦY ----
     if user_data.get("wait_phongthuy"):
         res = phongthuy_tudong(text)
-        await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text=res,
-            parse_mode="Markdown",
-            reply_markup=get_back_reset_keyboard("menu")
-        )
+        await reply(update, context, res, reply_markup=get_back_reset_keyboard("menu"))
         user_data["wait_phongthuy"] = None
         return
@@ -2,6 +2,7 @@
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes
 from handlers.ungho import ung_ho_gop_y
+from handlers.panel import reply, track_panel
 
 # ================== KEYBOARDS ==================
 def get_menu_keyboard():
@@ -21,6 +22,11 @@ def get_xien_cang_dao_keyboard():
             InlineKeyboardButton("✨ Xiên 3", callback_data="xien3"),
             InlineKeyboardButton("✨ Xiên 4", callback_data="xien4"),
         ],
+        [
+            InlineKeyboardButton("🧩 Xiên 3 phủ cặp", callback_data="xienphu_3_2"),
+            InlineKeyboardButton("🧩 Xiên 4 phủ cặp", callback_data="xienphu_4_2"),
+        ],
+        [InlineKeyboardButton("🧩 Xiên 4 phủ bộ 3", callback_data="xienphu_4_3")],
         [
             InlineKeyboardButton("🔢 Ghép càng 3D", callback_data="ghep_cang3d"),
             InlineKeyboardButton("🔢 Ghép càng 4D", callback_data="ghep_cang4d"),
@@ -41,16 +47,12 @@ def get_back_reset_keyboard(menu_callback="menu"):
 async def menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     text = "📋 *Chào mừng bạn đến với Trợ lý!*"
     if update.message:
-        await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text=text,
-            reply_markup=get_menu_keyboard(),
-            parse_mode="Markdown",
-        )
+        await reply(update, context, text, reply_markup=get_menu_keyboard(), new_panel=True)
 
 async def menu_callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     data = query.data
+    track_panel(update, context)
 
     # Menu chính
     if data == "menu":
@@ -80,6 +82,17 @@ async def menu_callback_handler(update: Update, context: ContextTypes.DEFAULT_TY
         )
         return
 
+    if data in ("xienphu_3_2", "xienphu_4_2", "xienphu_4_3"):
+        _, k, t = data.split("_")
+        context.user_data["wait_for_xien_cover"] = (int(k), int(t))
+        await query.edit_message_text(
+            f"Nhập dàn số (tách bằng khoảng trắng/phẩy). Bot sẽ ghép ít vé xiên {k} nhất "
+            f"sao cho mọi bộ {t} số trong dàn đều nằm trong ít nhất 1 vé:",
+            reply_markup=get_back_reset_keyboard("ghep_xien_cang_dao"),
+            parse_mode="Markdown",
+        )
+        return
+
     if data == "ghep_cang3d":
         context.user_data["wait_cang3d_numbers"] = True
         await query.edit_message_text(
@@ -127,6 +140,7 @@ async def menu_callback_handler(update: Update, context: ContextTypes.DEFAULT_TY
         hd = (
             "ℹ️ *Hướng dẫn nhanh*\n"
             "- Xiên: nhập dàn số rồi chọn Xiên 2/3/4.\n"
+            "- Xiên phủ: bộ vé tối giản đảm bảo mọi cặp/bộ 3 trong dàn đều có vé.\n"
             "- Càng: chọn 3D/4D → nhập dàn → nhập *càng*.\n"
             "- Đảo số: nhập số 2–6 chữ số, bot trả các hoán vị.\n"
             "- Phong thủy: nhập ngày dương hoặc can chi.\n"
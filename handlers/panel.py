@@ -0,0 +1,134 @@
+import os
+import time
+import asyncio
+from telegram import Update
+from telegram.error import BadRequest
+from telegram.ext import ContextTypes
+
+# ================== CẤU HÌNH (Railway → Variables) ==================
+# SINGLE_MESSAGE_UI=1    mỗi chat chỉ dùng 1 tin nhắn "panel", cập nhật bằng edit thay vì gửi mới
+# PANEL_DEBOUNCE_MS=300  các lần cập nhật dồn dập trong khoảng này được gộp thành 1 lần edit
+# Trong nhóm, mỗi người có panel riêng (cùng phạm vi với trạng thái luồng trong user_data).
+SINGLE_MESSAGE_UI = os.getenv("SINGLE_MESSAGE_UI", "").lower() in ("1", "true", "on")
+PANEL_DEBOUNCE = int(os.getenv("PANEL_DEBOUNCE_MS", "300")) / 1000
+
+# Lỗi edit cho biết panel không còn dùng được -> gửi panel mới. Lỗi khác (VD: sai Markdown) gửi lại cũng lỗi.
+_PANEL_GONE_ERRORS = ("message to edit not found", "message can't be edited")
+
+def _get_panel(update, context):
+    # Lưu trong chat_data theo user id (không để trong user_data vì nút Reset xóa sạch user_data
+    # trong khi task debounce có thể còn đang chờ)
+    user_id = update.effective_user.id if update.effective_user else None
+    panels = context.chat_data.setdefault("panels", {})
+    return panels.setdefault(user_id, {
+        "message_id": None,   # id tin nhắn panel hiện tại
+        "content": None,      # nội dung đang hiển thị trên panel
+        "pending": None,      # nội dung chờ edit (text, reply_markup, parse_mode, content)
+        "task": None,         # task debounce đang chờ
+        "last_edit": 0.0,
+    })
+
+def _content_key(text, reply_markup, parse_mode):
+    return (text, reply_markup.to_json() if reply_markup else None, parse_mode)
+
+def _cancel_pending(panel):
+    """Bỏ lần edit đang chờ debounce (nội dung cũ không được ghi đè lên màn hình mới)."""
+    if panel["task"]:
+        panel["task"].cancel()
+        panel["task"] = None
+    panel["pending"] = None
+
+def track_panel(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Ghi nhận tin nhắn chứa nút bấm vừa được callback là panel của chat (nội dung sẽ bị edit lại)."""
+    if not SINGLE_MESSAGE_UI or not update.callback_query or not update.callback_query.message:
+        return
+    panel = _get_panel(update, context)
+    _cancel_pending(panel)
+    panel["message_id"] = update.callback_query.message.message_id
+    # menu_callback_handler sẽ tự edit panel, nội dung cũ không còn đúng
+    panel["content"] = None
+    panel["last_edit"] = time.monotonic()
+
+async def _send_new(context, chat_id, panel, text, reply_markup, parse_mode, content):
+    msg = await context.bot.send_message(
+        chat_id=chat_id,
+        text=text,
+        parse_mode=parse_mode,
+        reply_markup=reply_markup,
+    )
+    panel["message_id"] = msg.message_id
+    panel["content"] = content
+
+async def _flush(context, chat_id, panel):
+    pending, panel["pending"] = panel["pending"], None
+    if pending is None:
+        return
+    text, reply_markup, parse_mode, content = pending
+    if content == panel["content"]:
+        return
+    panel["last_edit"] = time.monotonic()
+    if panel["message_id"] is None:
+        await _send_new(context, chat_id, panel, text, reply_markup, parse_mode, content)
+        return
+    try:
+        await context.bot.edit_message_text(
+            chat_id=chat_id,
+            message_id=panel["message_id"],
+            text=text,
+            parse_mode=parse_mode,
+            reply_markup=reply_markup,
+        )
+        panel["content"] = content
+    except BadRequest as e:
+        message = str(e).lower()
+        if "not modified" in message:
+            panel["content"] = content
+            return
+        if not any(err in message for err in _PANEL_GONE_ERRORS):
+            raise
+        # Panel đã bị xóa hoặc quá cũ để edit -> tạo panel mới
+        await _send_new(context, chat_id, panel, text, reply_markup, parse_mode, content)
+
+async def _flush_later(context, chat_id, panel, delay):
+    await asyncio.sleep(delay)
+    panel["task"] = None
+    await _flush(context, chat_id, panel)
+
+async def reply(update: Update, context: ContextTypes.DEFAULT_TYPE, text, reply_markup=None,
+                parse_mode="Markdown", new_panel=False):
+    """
+    Trả lời người dùng.
+    - Mặc định: gửi tin nhắn mới như trước.
+    - SINGLE_MESSAGE_UI: edit panel của chat, bỏ qua nếu nội dung không đổi,
+      gộp các lần edit dồn dập trong PANEL_DEBOUNCE (chỉ edit nội dung mới nhất).
+    - new_panel=True: luôn gửi tin nhắn mới và dùng nó làm panel (VD: /start, /menu).
+    """
+    chat_id = update.effective_chat.id
+    if not SINGLE_MESSAGE_UI:
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text=text,
+            parse_mode=parse_mode,
+            reply_markup=reply_markup,
+        )
+        return
+
+    panel = _get_panel(update, context)
+    content = _content_key(text, reply_markup, parse_mode)
+    if new_panel:
+        _cancel_pending(panel)
+        await _send_new(context, chat_id, panel, text, reply_markup, parse_mode, content)
+        return
+
+    panel["pending"] = (text, reply_markup, parse_mode, content)
+    if panel["task"]:
+        # Đã có lần edit đang chờ, nó sẽ lấy nội dung mới nhất
+        return
+    wait = panel["last_edit"] + PANEL_DEBOUNCE - time.monotonic()
+    if wait > 0:
+        # Truyền update để lỗi trong task chờ được chuyển tới error handler / log của Application
+        panel["task"] = context.application.create_task(
+            _flush_later(context, chat_id, panel, wait), update=update
+        )
+        return
+    await _flush(context, chat_id, panel)
@@ -0,0 +1,302 @@
+import os
+import sys
+import json
+import time
+import random
+import threading
+from collections import Counter
+from datetime import datetime
+from functools import wraps
+from telegram import Update
+from telegram.ext import ContextTypes
+
+# ================== CẤU HÌNH (Railway → Variables) ==================
+# PROFILE_MODE=1          bật profiling ngay khi khởi động (có thể bật/tắt bằng /profile)
+# PROFILE_SAMPLE_RATE=0.1 tỉ lệ update được lấy mẫu stack (0..1)
+# PROFILE_INTERVAL_MS=5   chu kỳ lấy mẫu stack
+# PROFILE_SLOW_MS=1000    update chậm hơn ngưỡng này sẽ được lưu lại
+# PROFILE_LATE_SAMPLE=0.5 update không trúng lượt lấy mẫu vẫn bắt đầu lấy mẫu khi chạy quá
+#                         PROFILE_LATE_SAMPLE × PROFILE_SLOW_MS, để update chậm nào cũng có stack
+# PROFILE_DIR=profiles    thư mục lưu update chậm và file collapsed stacks
+# PROFILE_MAX_SLOW=200    số file update chậm giữ lại trên đĩa, file cũ nhất bị xóa trước
+# PROFILE_ADMIN_IDS=1,2   user id được phép dùng lệnh /profile
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.1"))
+PROFILE_INTERVAL = int(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "1000"))
+PROFILE_LATE_SAMPLE = float(os.getenv("PROFILE_LATE_SAMPLE", "0.5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_SLOW = int(os.getenv("PROFILE_MAX_SLOW", "200"))
+PROFILE_ADMIN_IDS = {int(x) for x in os.getenv("PROFILE_ADMIN_IDS", "").replace(",", " ").split() if x.isdigit()}
+
+MAX_INPUT_LEN = 4000
+MAX_STATE_VALUE_LEN = 500
+MAX_SLOW_SEND = 10    # /profile slow gửi tối đa bấy nhiêu file mỗi lần
+
+# Thread rảnh (chờ việc/chờ I/O) có frame trong cùng nằm ở các file này, không tính là đang chạy
+_IDLE_THREAD_FILES = ("threading.py", "queue.py", "selectors.py")
+
+_state = {"enabled": os.getenv("PROFILE_MODE", "").lower() in ("1", "true", "on")}
+_lock = threading.Lock()
+_active = {}          # id(record) -> record của các update đang được lấy mẫu
+_pending = {}         # id(record) -> record chưa lấy mẫu, bắt đầu lấy mẫu khi quá record["deadline"]
+_collapsed = Counter()  # stack gộp của các update trúng lượt lấy mẫu, để xuất flamegraph
+_wakeup = threading.Event()
+_sampler = None
+
+def is_enabled():
+    return _state["enabled"]
+
+def set_enabled(enabled):
+    _state["enabled"] = bool(enabled)
+
+# ================== LẤY MẪU STACK ==================
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+def _unwind(frame):
+    """Trả về danh sách frame của 1 thread (gốc trước, lá sau)."""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+def _is_idle_thread(frames):
+    if not frames:
+        return True
+    leaf = frames[-1].f_code
+    name = os.path.basename(leaf.co_filename)
+    # Worker rảnh của ThreadPoolExecutor (asyncio.to_thread) dừng ở _worker, chờ queue bằng C
+    return name in _IDLE_THREAD_FILES or (name == "thread.py" and leaf.co_name == "_worker")
+
+def _promote_pending(now):
+    """Chuyển các update chờ đã quá hạn sang lấy mẫu; trả về hạn sớm nhất còn lại (gọi khi giữ _lock)."""
+    next_deadline = None
+    for key, record in list(_pending.items()):
+        if record["deadline"] <= now:
+            del _pending[key]
+            record["sampled_from_ms"] = round((now - record["start"]) * 1000, 1)
+            _active[key] = record
+        elif next_deadline is None or record["deadline"] < next_deadline:
+            next_deadline = record["deadline"]
+    return next_deadline
+
+def _sampler_loop():
+    # Hạn chờ được kiểm tra ở thread này chứ không bằng loop.call_later,
+    # vì update chậm do tính toán nặng sẽ chặn event loop và timer không chạy được.
+    while True:
+        _wakeup.wait()
+        with _lock:
+            now = time.perf_counter()
+            next_deadline = _promote_pending(now)
+            idle = not _active
+            if idle:
+                _wakeup.clear()
+        if idle:
+            if next_deadline is not None:
+                _wakeup.wait(max(next_deadline - now, 0))
+                _wakeup.set()
+            continue
+        time.sleep(PROFILE_INTERVAL)
+        with _lock:
+            _promote_pending(time.perf_counter())
+            records = list(_active.values())
+        current = sys._current_frames()
+        loop_tids = {record["thread_id"] for record in records}
+        stacks = {tid: _unwind(current[tid]) for tid in loop_tids if tid in current}
+        # Việc đẩy sang thread khác (asyncio.to_thread, run_in_executor) khi update đang chờ
+        offloaded = []
+        for tid, frame in current.items():
+            if tid == threading.get_ident() or tid in loop_tids:
+                continue
+            frames = _unwind(frame)
+            if not _is_idle_thread(frames):
+                offloaded.append("(thread);" + ";".join(_frame_name(f) for f in frames))
+        del current
+
+        samples = []
+        for record in records:
+            frames = stacks.get(record["thread_id"], [])
+            # Chỉ tính mẫu khi coroutine của chính update này đang chạy trên CPU,
+            # các update chạy song song trên cùng event loop không bị tính lẫn.
+            if record["frame"] in frames:
+                start = frames.index(record["frame"])
+                samples.append((record, [";".join(_frame_name(f) for f in frames[start:])]))
+            elif offloaded:
+                # Update đang chờ -> gán việc ở thread khác cho nó. Nếu nhiều update cùng chờ
+                # thì không phân biệt được, mỗi update đều nhận các stack này.
+                root = _frame_name(record["frame"])
+                samples.append((record, [f"{root};{stack}" for stack in offloaded]))
+            else:
+                samples.append((record, None))
+        del stacks
+        with _lock:
+            for record, record_stacks in samples:
+                if id(record) not in _active:
+                    continue
+                if record_stacks is None:
+                    record["idle_samples"] += 1
+                else:
+                    record["stacks"].update(record_stacks)
+
+def _ensure_sampler():
+    global _sampler
+    with _lock:
+        if _sampler is None:
+            _sampler = threading.Thread(target=_sampler_loop, name="profile-sampler", daemon=True)
+            _sampler.start()
+
+def _track(record, sample_now):
+    _ensure_sampler()
+    with _lock:
+        if sample_now:
+            record["sampled_from_ms"] = 0.0
+            _active[id(record)] = record
+        else:
+            _pending[id(record)] = record
+    _wakeup.set()
+
+# ================== LƯU UPDATE CHẬM ==================
+def _sanitize_input(update):
+    """Chỉ giữ nội dung nhập (text/callback data), bỏ mọi thông tin định danh người dùng."""
+    if getattr(update, "callback_query", None):
+        return {"type": "callback", "data": (update.callback_query.data or "")[:MAX_INPUT_LEN]}
+    if getattr(update, "message", None):
+        return {"type": "message", "text": (update.message.text or "")[:MAX_INPUT_LEN]}
+    return {"type": "other"}
+
+def _sanitize_state(user_data):
+    state = {}
+    for key, value in (user_data or {}).items():
+        if not isinstance(value, (str, int, float, bool, type(None))):
+            value = repr(value)
+        if isinstance(value, str):
+            value = value[:MAX_STATE_VALUE_LEN]
+        state[str(key)] = value
+    return state
+
+def _save_slow_update(handler_name, elapsed_ms, update, state_before, record):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    path = os.path.join(PROFILE_DIR, f"slow-{stamp}-{handler_name}.json")
+    payload = {
+        "handler": handler_name,
+        "elapsed_ms": round(elapsed_ms, 1),
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "input": _sanitize_input(update),
+        "state": state_before,
+        "sampled": record["sampled_from_ms"] is not None,
+        # > 0 nếu update chỉ được lấy mẫu từ mốc này (không trúng lượt lấy mẫu ban đầu)
+        "sampled_from_ms": record["sampled_from_ms"],
+        "idle_samples": record["idle_samples"],
+        "stacks": [f"{s} {c}" for s, c in record["stacks"].most_common()],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    for old in list_slow_updates()[:-max(PROFILE_MAX_SLOW, 1)]:
+        os.remove(old)
+    return path
+
+def list_slow_updates():
+    """Các file update chậm trong PROFILE_DIR, cũ trước mới sau (tên file bắt đầu bằng thời điểm)."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    names = sorted(x for x in os.listdir(PROFILE_DIR) if x.startswith("slow-") and x.endswith(".json"))
+    return [os.path.join(PROFILE_DIR, x) for x in names]
+
+def dump_collapsed(path=None):
+    """Ghi stack gộp ra file theo định dạng collapsed (dùng được với flamegraph.pl / speedscope)."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    if path is None:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(PROFILE_DIR, f"collapsed-{stamp}.txt")
+    with _lock:
+        lines = [f"{stack} {count}" for stack, count in _collapsed.most_common()]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + ("\n" if lines else ""))
+    return path, len(lines)
+
+# ================== DECORATOR ==================
+def profiled(handler):
+    """
+    Bọc handler async: khi profiling bật thì đo thời gian mọi update,
+    lấy mẫu stack theo PROFILE_SAMPLE_RATE và lưu lại update chậm hơn PROFILE_SLOW_MS.
+    Update không trúng lượt vẫn được lấy mẫu nếu chạy quá PROFILE_LATE_SAMPLE × PROFILE_SLOW_MS,
+    nhưng stack của nó chỉ nằm trong file update chậm, không cộng vào flamegraph tổng.
+    """
+    @wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if not _state["enabled"]:
+            return await handler(update, context)
+
+        state_before = _sanitize_state(context.user_data)
+        coro = handler(update, context)
+        record = {
+            "thread_id": threading.get_ident(),
+            "frame": coro.cr_frame,
+            "stacks": Counter(),
+            "idle_samples": 0,
+            "sampled_from_ms": None,
+        }
+        in_aggregate = random.random() < PROFILE_SAMPLE_RATE
+        start = record["start"] = time.perf_counter()
+        record["deadline"] = start + PROFILE_SLOW_MS * PROFILE_LATE_SAMPLE / 1000
+        _track(record, sample_now=in_aggregate)
+
+        try:
+            return await coro
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with _lock:
+                _active.pop(id(record), None)
+                _pending.pop(id(record), None)
+                if in_aggregate:
+                    _collapsed.update(record["stacks"])
+            if elapsed_ms >= PROFILE_SLOW_MS:
+                try:
+                    _save_slow_update(handler.__name__, elapsed_ms, update, state_before, record)
+                except OSError as e:
+                    print(f"⚠️ Không lưu được update chậm: {e}")
+    return wrapper
+
+# ================== LỆNH /profile ==================
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/profile on | off | dump | slow [N] | status – chỉ dành cho PROFILE_ADMIN_IDS."""
+    user = update.effective_user
+    if not user or user.id not in PROFILE_ADMIN_IDS:
+        return
+    action = (context.args[0].lower() if context.args else "status")
+
+    if action == "on":
+        set_enabled(True)
+        text = f"🟢 Đã bật profiling (lấy mẫu {PROFILE_SAMPLE_RATE:.0%}, ngưỡng chậm {PROFILE_SLOW_MS:.0f}ms)."
+    elif action == "off":
+        set_enabled(False)
+        text = "⚪️ Đã tắt profiling."
+    elif action == "dump":
+        path, n = dump_collapsed()
+        if n:
+            with open(path, "rb") as f:
+                await update.effective_message.reply_document(document=f, filename=os.path.basename(path))
+            return
+        text = "Chưa có mẫu stack nào."
+    elif action == "slow":
+        # Gửi N file update chậm mới nhất để tải về tái hiện offline
+        n = int(context.args[1]) if len(context.args) > 1 and context.args[1].isdigit() else 5
+        paths = list_slow_updates()[-min(max(n, 1), MAX_SLOW_SEND):]
+        for path in reversed(paths):
+            with open(path, "rb") as f:
+                await update.effective_message.reply_document(document=f, filename=os.path.basename(path))
+        if paths:
+            return
+        text = "Chưa có update chậm nào."
+    else:
+        text = (
+            f"Profiling: {'bật' if _state['enabled'] else 'tắt'}\n"
+            f"Lấy mẫu: {PROFILE_SAMPLE_RATE:.0%}, chu kỳ {PROFILE_INTERVAL * 1000:.0f}ms\n"
+            f"Ngưỡng chậm: {PROFILE_SLOW_MS:.0f}ms → {PROFILE_DIR}/ "
+            f"({len(list_slow_updates())}/{PROFILE_MAX_SLOW} file)"
+        )
+    await update.effective_message.reply_text(text)
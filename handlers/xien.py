@@ -1,4 +1,6 @@
 import itertools
+import math
+from functools import lru_cache
 
 def clean_numbers_input(text):
     """
@@ -38,3 +40,175 @@ def format_xien_result(combos):
         lines.append(", ".join(chunk))
     result = "*Kết quả tổ hợp xiên:*\n" + "\n".join(lines)
     return result
+
+# ================== XIÊN PHỦ (COVERING DESIGN) ==================
+# Dàn lớn hơn mức này bị từ chối: thời gian và bộ nhớ tăng cỡ n^3 (xiên 4 phủ bộ 3)
+MAX_COVER_NUMBERS = 100
+
+def _cyclic_cover(n, base_blocks):
+    """Sinh bộ phủ bằng cách tịnh tiến các vé gốc theo modulo n (bỏ vé trùng)."""
+    return sorted({tuple(sorted((x + s) % n for x in b)) for b in base_blocks for s in range(n)})
+
+# Bộ vé phủ tốt nhất đã biết cho một số cỡ dàn phổ biến, viết theo chỉ số 0..n-1.
+# Khóa: (n, k, t) -> danh sách vé k số sao cho mọi bộ t số đều nằm trong ít nhất 1 vé.
+# Mọi bộ dưới đây đều có số vé ít nhất có thể (đã biết là tối ưu). Tất cả đạt cận dưới
+# Schönheim, trừ (10, 4, 2): cận là 8 nhưng đã biết cần ít nhất 9 vé.
+BEST_KNOWN_COVERS = {
+    (10, 3, 2): [
+        (0, 1, 7), (0, 2, 4), (0, 3, 7), (0, 5, 8), (0, 6, 9), (1, 2, 3), (1, 4, 9),
+        (1, 5, 6), (1, 6, 8), (2, 3, 6), (2, 5, 9), (2, 7, 8), (3, 4, 5), (3, 8, 9),
+        (4, 6, 7), (4, 8, 9), (5, 7, 9),
+    ],
+    (12, 3, 2): [
+        (0, 1, 9), (0, 2, 5), (0, 3, 7), (0, 4, 5), (0, 6, 11), (0, 8, 10), (1, 2, 6), (1, 3, 10),
+        (1, 4, 8), (1, 5, 11), (1, 6, 7), (2, 3, 11), (2, 4, 9), (2, 7, 8), (2, 10, 11), (3, 4, 9),
+        (3, 5, 10), (3, 6, 8), (4, 6, 10), (4, 7, 11), (5, 6, 9), (5, 7, 8), (7, 9, 10), (8, 9, 11),
+    ],
+    # Hệ bộ ba Steiner dạng vòng: 26 / 35 / 57 vé
+    (13, 3, 2): _cyclic_cover(13, [(0, 1, 4), (0, 2, 7)]),
+    (15, 3, 2): _cyclic_cover(15, [(0, 1, 4), (0, 2, 8), (0, 5, 10)]),
+    (19, 3, 2): _cyclic_cover(19, [(0, 1, 4), (0, 2, 9), (0, 5, 11)]),
+    (20, 3, 2): [
+        (0, 1, 19), (0, 2, 16), (0, 3, 13), (0, 4, 15), (0, 5, 17), (0, 6, 11), (0, 7, 14),
+        (0, 7, 18), (0, 8, 9), (0, 10, 12), (1, 2, 6), (1, 3, 11), (1, 4, 7), (1, 5, 10),
+        (1, 8, 13), (1, 9, 14), (1, 10, 15), (1, 12, 18), (1, 16, 17), (2, 3, 17), (2, 4, 14),
+        (2, 5, 11), (2, 7, 10), (2, 8, 12), (2, 9, 15), (2, 13, 18), (2, 18, 19), (3, 4, 19),
+        (3, 5, 8), (3, 6, 9), (3, 7, 12), (3, 10, 14), (3, 14, 18), (3, 15, 16), (4, 5, 6),
+        (4, 8, 10), (4, 9, 12), (4, 10, 16), (4, 11, 18), (4, 13, 17), (5, 7, 9), (5, 12, 19),
+        (5, 13, 16), (5, 14, 19), (5, 15, 18), (6, 7, 16), (6, 8, 14), (6, 10, 18), (6, 12, 15),
+        (6, 12, 17), (6, 13, 19), (7, 8, 13), (7, 11, 17), (7, 15, 19), (8, 11, 15), (8, 16, 19),
+        (8, 17, 18), (9, 10, 17), (9, 11, 19), (9, 13, 15), (9, 16, 18), (10, 11, 13),
+        (10, 17, 19), (11, 12, 16), (11, 14, 16), (12, 13, 14), (14, 15, 17),
+    ],
+    (10, 4, 2): [
+        (0, 1, 2, 3), (0, 4, 6, 9), (0, 5, 7, 8), (1, 2, 5, 6), (1, 3, 5, 9),
+        (1, 4, 7, 8), (2, 3, 4, 5), (2, 7, 8, 9), (3, 6, 7, 8),
+    ],
+    (12, 4, 2): [
+        (0, 1, 4, 11), (0, 2, 3, 10), (0, 5, 7, 8), (0, 6, 8, 9), (1, 2, 5, 9), (1, 2, 6, 7),
+        (1, 3, 8, 10), (2, 4, 8, 11), (3, 4, 5, 6), (3, 7, 9, 11), (4, 7, 9, 10), (5, 6, 10, 11),
+    ],
+    # Mặt phẳng xạ ảnh bậc 3: 13 vé xiên 4 phủ 78 cặp của dàn 13 số
+    (13, 4, 2): _cyclic_cover(13, [(0, 1, 3, 9)]),
+    # Mặt phẳng Fano: 7 vé xiên 3 phủ 21 cặp của dàn 7 số
+    (7, 3, 2): [
+        (0, 1, 2), (0, 3, 4), (0, 5, 6), (1, 3, 5),
+        (1, 4, 6), (2, 3, 6), (2, 4, 5),
+    ],
+    # Mặt phẳng affine bậc 3: 12 vé xiên 3 phủ 36 cặp của dàn 9 số
+    (9, 3, 2): [
+        (0, 1, 2), (3, 4, 5), (6, 7, 8),
+        (0, 3, 6), (1, 4, 7), (2, 5, 8),
+        (0, 4, 8), (1, 5, 6), (2, 3, 7),
+        (0, 5, 7), (1, 3, 8), (2, 4, 6),
+    ],
+    # Hệ Steiner SQS(8): 14 vé xiên 4 phủ 56 bộ ba của dàn 8 số
+    (8, 4, 3): [
+        (0, 1, 2, 3), (4, 5, 6, 7), (0, 1, 4, 5), (2, 3, 6, 7),
+        (0, 1, 6, 7), (2, 3, 4, 5), (0, 2, 4, 6), (1, 3, 5, 7),
+        (0, 2, 5, 7), (1, 3, 4, 6), (0, 3, 4, 7), (1, 2, 5, 6),
+        (0, 3, 5, 6), (1, 2, 4, 7),
+    ],
+}
+
+def _subset_mask(subset):
+    mask = 0
+    for i in subset:
+        mask |= 1 << i
+    return mask
+
+def _greedy_cover(n, k, t):
+    """
+    Dựng bộ phủ (n, k, t) bằng thuật toán tham lam trên bitmask.
+    - uncovered[S] (S là bộ t-1 chỉ số) = bitmask các số d sao cho S ∪ {d} chưa được phủ.
+    - Mỗi vé bắt đầu từ bộ t chưa phủ nhỏ nhất, rồi thêm dần số phủ thêm nhiều bộ t nhất.
+    - Cuối cùng bỏ các vé thừa (mọi bộ t của vé đã được vé khác phủ).
+    """
+    full = (1 << n) - 1
+    uncovered = {}
+    for s in itertools.combinations(range(n), t - 1):
+        uncovered[s] = full & ~_subset_mask(s)
+
+    # Các bộ t-1 theo thứ tự từ điển, dùng để tìm bộ t chưa phủ nhỏ nhất
+    seeds = list(uncovered)
+    pos = 0
+    blocks = []
+    while True:
+        # Tìm bộ t chưa phủ nhỏ nhất: S ∪ {d} với d > max(S)
+        while pos < len(seeds):
+            s = seeds[pos]
+            start = s[-1] + 1 if s else 0
+            upper = uncovered[s] >> start
+            if upper:
+                d = start + (upper & -upper).bit_length() - 1
+                block = list(s) + [d]
+                break
+            pos += 1
+        else:
+            break
+
+        block_mask = _subset_mask(block)
+        while len(block) < k:
+            # levels[i] = các số d phủ thêm ít nhất i+1 bộ t nếu thêm vào vé
+            levels = [0] * (len(block) + 1)
+            for s in itertools.combinations(block, t - 1):
+                m = uncovered[s] & ~block_mask
+                for i in range(len(levels) - 1, 0, -1):
+                    levels[i] |= levels[i - 1] & m
+                levels[0] |= m
+            best = next((lv for lv in reversed(levels) if lv), full & ~block_mask)
+            d = (best & -best).bit_length() - 1
+            block.append(d)
+            block_mask |= 1 << d
+
+        block.sort()
+        for ts in itertools.combinations(block, t):
+            for j, d in enumerate(ts):
+                s = ts[:j] + ts[j + 1:]
+                uncovered[s] &= ~(1 << d)
+        blocks.append(tuple(block))
+
+    # Bỏ vé thừa, xét từ vé dựng sau cùng (thường phủ ít bộ mới nhất)
+    counts = {}
+    for block in blocks:
+        for ts in itertools.combinations(block, t):
+            counts[ts] = counts.get(ts, 0) + 1
+    kept = []
+    for block in reversed(blocks):
+        subsets = list(itertools.combinations(block, t))
+        if all(counts[ts] > 1 for ts in subsets):
+            for ts in subsets:
+                counts[ts] -= 1
+        else:
+            kept.append(block)
+    kept.reverse()
+    return kept
+
+@lru_cache(maxsize=16)
+def _cover_indices(n, k, t):
+    """Bộ phủ theo chỉ số, ưu tiên bảng tốt nhất đã biết, có cache theo (n, k, t)."""
+    if (n, k, t) in BEST_KNOWN_COVERS:
+        return tuple(BEST_KNOWN_COVERS[(n, k, t)])
+    return tuple(_greedy_cover(n, k, t))
+
+def gen_xien_cover(numbers, k, t=2):
+    """
+    Sinh bộ vé xiên k tối giản sao cho mọi bộ t số trong dàn đều trúng ít nhất 1 vé.
+    Trả về list tổ hợp (tuple), rỗng nếu dàn không đủ số hoặc t không hợp lệ.
+    """
+    numbers = list(dict.fromkeys(numbers))  # Loại bỏ trùng
+    if not 1 <= t <= k or len(numbers) < k:
+        return []
+    return [tuple(numbers[i] for i in block) for block in _cover_indices(len(numbers), k, t)]
+
+def format_xien_cover_result(combos, numbers, k, t):
+    """Định dạng kết quả xiên phủ, kèm so sánh với số tổ hợp đầy đủ C(n, k)."""
+    if not combos:
+        return "❗ Không đủ số để ghép xiên."
+    n = len(dict.fromkeys(numbers))
+    total = math.comb(n, k)
+    header = (
+        f"*Xiên {k} phủ mọi bộ {t} số:* {len(combos)} vé "
+        f"(thay vì {total} tổ hợp đầy đủ, dàn {n} số)\n"
+    )
+    return header + format_xien_result(combos).split("\n", 1)[1]
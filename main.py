@@ -2,6 +2,8 @@ import os
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters
 from handlers.menu import menu, menu_callback_handler
 from handlers.input_handler import handle_user_free_input
+from handlers.profiler import profiled, profile_command
+from bot_request import build_request
 
 TOKEN = os.getenv("BOT_TOKEN")
 APP_URL = os.getenv("APP_URL")  # ví dụ: https://your-app-name.up.railway.app
@@ -12,13 +14,15 @@ def main():
     if not APP_URL:
         raise ValueError("❌ APP_URL chưa được set. VD: https://your-app-name.up.railway.app")
 
-    app = Application.builder().token(TOKEN).build()
+    # Connection pool, keep-alive, HTTP/2 và timeout lấy từ env (xem bot_request.py)
+    app = Application.builder().token(TOKEN).request(build_request()).build()
 
     app.add_handler(CommandHandler(["start", "menu"], menu))
-    app.add_handler(CallbackQueryHandler(menu_callback_handler))
+    app.add_handler(CommandHandler("profile", profile_command))
+    app.add_handler(CallbackQueryHandler(profiled(menu_callback_handler)))
 
     # Nhập text tự do
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_user_free_input))
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, profiled(handle_user_free_input)))
 
     PORT = int(os.getenv("PORT", 8080))
     print("🤖 Bot is running with webhook on Railway...")